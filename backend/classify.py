@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import logging
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import date
+from sqlite3 import Connection
+from typing import Any
+
+from .dates import parse_date
+from .hierarchy import ancestry, load_nodes
+
+logger = logging.getLogger(__name__)
+
+
+def version_intervals(conn: Connection) -> tuple[list[date], list[int]]:
+    """Return sorted effective dates and the version id in force from each one.
+
+    Version ``ids[i]`` applies on ``starts[i] <= d < starts[i + 1]``. When two
+    versions share an effective date the most recently ingested one wins.
+    Versions whose ``effective_date`` cannot be parsed are left out.
+    """
+    by_start: dict[date, int] = {}
+    cur = conn.execute("SELECT id, effective_date FROM gics_version ORDER BY id")
+    for version_id, effective in cur:
+        start = parse_date(effective)
+        if start is None:
+            logger.warning(
+                "Ignoring version_id=%s with unparseable effective_date=%r",
+                version_id,
+                effective,
+            )
+            continue
+        by_start[start] = version_id
+    starts = sorted(by_start)
+    return starts, [by_start[s] for s in starts]
+
+
+def resolve_version(starts: list[date], ids: list[int], as_of: date) -> int | None:
+    pos = bisect_right(starts, as_of)
+    if pos == 0:
+        return None
+    return ids[pos - 1]
+
+
+def classify_as_of(
+    conn: Connection, codes: Sequence[str], as_of_dates: Sequence[str]
+) -> list[dict[str, Any]]:
+    """Resolve each ``(code, as_of_date)`` pair against the version in force.
+
+    Rows are grouped by distinct date and then by version so every date is
+    parsed once and every version's hierarchy is loaded once per batch,
+    regardless of how many rows reference it.
+    """
+    if len(codes) != len(as_of_dates):
+        raise ValueError("codes and as_of_dates must have the same length")
+    starts, ids = version_intervals(conn)
+
+    version_for_date: dict[str, int | None] = {}
+    invalid_dates: set[str] = set()
+    for raw in set(as_of_dates):
+        parsed = parse_date(raw)
+        if parsed is None:
+            invalid_dates.add(raw)
+            version_for_date[raw] = None
+        else:
+            version_for_date[raw] = resolve_version(starts, ids, parsed)
+
+    rows_by_version: dict[int, list[int]] = defaultdict(list)
+    results: list[dict[str, Any]] = []
+    for idx, (code, raw) in enumerate(zip(codes, as_of_dates)):
+        version_id = version_for_date[raw]
+        if raw in invalid_dates:
+            error: str | None = "invalid date"
+        elif version_id is None:
+            error = "no version effective"
+        else:
+            error = None
+            rows_by_version[version_id].append(idx)
+        results.append(
+            {
+                "code": code,
+                "as_of_date": raw,
+                "version_id": version_id,
+                "ancestry": None,
+                "error": error,
+            }
+        )
+
+    for version_id in sorted(rows_by_version):
+        nodes = load_nodes(conn, version_id)
+        cache: dict[str, list[dict[str, Any]] | None] = {}
+        for idx in rows_by_version[version_id]:
+            code = results[idx]["code"]
+            if code not in cache:
+                cache[code] = ancestry(nodes, code)
+            path = cache[code]
+            results[idx]["ancestry"] = path
+            if path is None:
+                results[idx]["error"] = "code not found"
+    return results
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from datetime import date
+
+
+def parse_date(val: str | None) -> date | None:
+    """Parse the ``YYYY-MM-DD`` prefix of ``val``; None if absent or invalid.
+
+    Shared by point-in-time classification and code history so both order
+    versions by the same effective dates.
+    """
+    if val is None:
+        return None
+    try:
+        return date.fromisoformat(str(val).strip()[:10])
+    except ValueError:
+        return None
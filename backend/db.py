@@ -1,15 +1,31 @@
 from __future__ import annotations
 
+import fcntl
+import hashlib
 import logging
 import os
 import sqlite3
+import threading
+import uuid
 from pathlib import Path
 from sqlite3 import Connection, Row
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_DB_PATH = Path("/var/lib/gics-explorer/gics.db")
-DB_PATH = Path(os.environ.get("GICS_DB_PATH", DEFAULT_DB_PATH)).expanduser()
+DB_PATH = Path(os.environ.get("GICS_DB_PATH", str(DEFAULT_DB_PATH))).expanduser()
+# Read-only copy of DB_PATH served to request handlers; replaced atomically on
+# every publish so readers never contend with ingest write locks.
+SNAPSHOT_PATH = Path(
+    os.environ.get("GICS_SNAPSHOT_PATH", str(DB_PATH.with_suffix(".snapshot.db")))
+).expanduser()
+# Held exclusively while publishing so concurrent publishes cannot reorder.
+SNAPSHOT_LOCK_PATH = SNAPSHOT_PATH.with_name(f".{SNAPSHOT_PATH.name}.lock")
+SNAPSHOT_MMAP_SIZE = int(
+    os.environ.get("GICS_SNAPSHOT_MMAP_SIZE", str(256 * 1024 * 1024))
+)
+
+_local = threading.local()
 
 
 def _ensure_parent_directory(path: Path) -> None:
@@ -31,7 +47,184 @@ def get_conn() -> Connection:
     return conn
 
 
+# Tables that held names and definitions inline before gics_text existed:
+# table -> (insert into node table, select from legacy table, text columns)
+_LEGACY_TABLES: dict[str, tuple[str, str, tuple[int, ...]]] = {
+    "gics_sector": (
+        "INSERT INTO gics_sector_node(code2, name_id, version_id) VALUES (?,?,?)",
+        "SELECT code2, name, version_id FROM gics_sector_legacy",
+        (1,),
+    ),
+    "gics_group": (
+        "INSERT INTO gics_group_node(code4, name_id, sector_code2, version_id) VALUES (?,?,?,?)",
+        "SELECT code4, name, sector_code2, version_id FROM gics_group_legacy",
+        (1,),
+    ),
+    "gics_industry": (
+        "INSERT INTO gics_industry_node(code6, name_id, group_code4, version_id) VALUES (?,?,?,?)",
+        "SELECT code6, name, group_code4, version_id FROM gics_industry_legacy",
+        (1,),
+    ),
+    "gics_sub_industry": (
+        "INSERT INTO gics_sub_industry_node(code8, name_id, definition_id, industry_code6, version_id) VALUES (?,?,?,?,?)",
+        "SELECT code8, name, definition, industry_code6, version_id FROM gics_sub_industry_legacy",
+        (1, 2),
+    ),
+}
+
+
+def intern_text(
+    conn: Connection, text: str | None, cache: dict[str, int] | None = None
+) -> int | None:
+    """Return the gics_text id for ``text``, inserting it on first use."""
+    if text is None:
+        return None
+    if cache is not None and text in cache:
+        return cache[text]
+    digest = hashlib.sha256(text.encode()).digest()
+    conn.execute(
+        "INSERT OR IGNORE INTO gics_text(digest, body) VALUES (?,?)", (digest, text)
+    )
+    text_id = conn.execute(
+        "SELECT id FROM gics_text WHERE digest=?", (digest,)
+    ).fetchone()[0]
+    if cache is not None:
+        cache[text] = text_id
+    return text_id
+
+
+def _statements(script: str) -> list[str]:
+    statements: list[str] = []
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            statements.append(buf)
+            buf = ""
+    return statements
+
+
+def _migrate_legacy_tables(conn: Connection) -> None:
+    logger.info("Migrating inline names and definitions into gics_text")
+    cache: dict[str, int] = {}
+    for insert, select, text_columns in _LEGACY_TABLES.values():
+        for row in conn.execute(select).fetchall():
+            values = list(row)
+            for idx in text_columns:
+                values[idx] = intern_text(conn, values[idx], cache)
+            conn.execute(insert, values)
+    for table in reversed(list(_LEGACY_TABLES)):
+        conn.execute(f"DROP TABLE {table}_legacy")
+
+
 def init_db() -> None:
     schema = Path(__file__).with_name("schema.sql")
-    with get_conn() as conn, open(schema) as f:
-        conn.executescript(f.read())
+    with open(schema) as f:
+        statements = _statements(f.read())
+    conn = get_conn()
+    # Manage the transaction by hand: the legacy check, the schema and the
+    # migration must all run under one write lock, or concurrently starting
+    # workers could each try to migrate the same tables.
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "SELECT type FROM sqlite_master WHERE name='gics_sector'"
+            )
+            row = cur.fetchone()
+            legacy = row is not None and row[0] == "table"
+            if legacy:
+                for table in _LEGACY_TABLES:
+                    conn.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+            for statement in statements:
+                conn.execute(statement)
+            if legacy:
+                _migrate_legacy_tables(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    publish_snapshot()
+
+
+def _fsync(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def publish_snapshot() -> Path:
+    """Copy the staging database to SNAPSHOT_PATH via an atomic rename."""
+    _ensure_parent_directory(SNAPSHOT_PATH)
+    # Serialise publishes across workers and threads. Otherwise a backup taken
+    # before another worker's commit could be renamed over that worker's newer
+    # snapshot and hide its version from every reader.
+    with open(SNAPSHOT_LOCK_PATH, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        tmp = SNAPSHOT_PATH.with_name(f".{SNAPSHOT_PATH.name}.{uuid.uuid4().hex}.tmp")
+        src = get_conn()
+        dst = sqlite3.connect(tmp)
+        try:
+            src.backup(dst)
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+            src.close()
+        try:
+            _fsync(tmp)
+            os.replace(tmp, SNAPSHOT_PATH)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        # Persist the rename itself so a crash cannot roll the snapshot back.
+        _fsync(SNAPSHOT_PATH.parent)
+    logger.info("Published database snapshot to %s", SNAPSHOT_PATH)
+    return SNAPSHOT_PATH
+
+
+def snapshot_key() -> tuple[int, int, int, int] | None:
+    """Identify the published snapshot; changes whenever a new one is published."""
+    try:
+        st = os.stat(SNAPSHOT_PATH)
+    except FileNotFoundError:
+        return None
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def connect_read() -> Connection:
+    """Open a new read-only, immutable connection to the published snapshot.
+
+    Falls back to the staging database if nothing has been published yet.
+    """
+    if not SNAPSHOT_PATH.exists():
+        return get_conn()
+    uri = f"{SNAPSHOT_PATH.resolve().as_uri()}?immutable=1&mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.row_factory = Row
+    conn.execute(f"PRAGMA mmap_size={SNAPSHOT_MMAP_SIZE:d}")
+    return conn
+
+
+def get_read_conn() -> Connection:
+    """Return this thread's connection to the current published snapshot.
+
+    The snapshot is opened with ``immutable=1`` so SQLite skips locking and
+    change detection entirely; a newly published snapshot is picked up on the
+    next call. Falls back to the staging database if nothing is published.
+    """
+    key = snapshot_key()
+    if key is None:
+        return get_conn()
+    cached = getattr(_local, "snapshot", None)
+    if cached is not None:
+        if cached[0] == key:
+            return cached[1]
+        cached[1].close()
+    conn = connect_read()
+    _local.snapshot = (key, conn)
+    return conn
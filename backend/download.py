@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlparse
+
+import httpx
+
+from .db import DB_PATH
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(
+    os.environ.get("GICS_CACHE_DIR", str(DB_PATH.with_name("download-cache")))
+).expanduser()
+MAX_DOWNLOAD_BYTES = int(
+    os.environ.get("GICS_MAX_DOWNLOAD_BYTES", str(50 * 1024 * 1024))
+)
+CACHE_MAX_BYTES = int(os.environ.get("GICS_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+# Blobs used this recently are never evicted, so a file returned by
+# fetch_workbook in one worker survives until its ingest has read it even
+# when another worker prunes the shared cache.
+CACHE_MIN_AGE = float(os.environ.get("GICS_CACHE_MIN_AGE", "600"))
+CHUNK_SIZE = 64 * 1024
+
+
+def _meta_path(url: str) -> Path:
+    key = hashlib.sha256(url.encode()).hexdigest()
+    return CACHE_DIR / "urls" / f"{key}.json"
+
+
+def _read_meta(url: str) -> dict[str, str] | None:
+    try:
+        with _meta_path(url).open() as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get("url") != url or not (CACHE_DIR / meta.get("blob", "")).is_file():
+        return None
+    return meta
+
+
+def _write_meta(url: str, meta: dict[str, str]) -> None:
+    path = _meta_path(url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, path)
+
+
+def fetch_workbook(url: str, max_bytes: int | None = None) -> Path:
+    """Return a local path holding the content at ``url``.
+
+    The response is streamed to disk in chunks and stored under the SHA-256
+    of its content. Later calls for the same URL send ``If-None-Match`` /
+    ``If-Modified-Since`` and reuse the cached file on ``304 Not Modified``.
+    The returned file is not evicted for ``CACHE_MIN_AGE`` seconds.
+    Raises ValueError if the body is larger than ``max_bytes``.
+    """
+    limit = MAX_DOWNLOAD_BYTES if max_bytes is None else max_bytes
+    meta = _read_meta(url)
+    headers: dict[str, str] = {}
+    if meta is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with (
+        httpx.Client(follow_redirects=True) as client,
+        client.stream("GET", url, headers=headers) as resp,
+    ):
+        if resp.status_code == 304 and meta is not None:
+            cached = CACHE_DIR / meta["blob"]
+            try:
+                # Mark as recently used so eviction skips it while we read it.
+                os.utime(cached)
+            except FileNotFoundError:
+                # Another worker evicted it after _read_meta; fetch it afresh.
+                logger.info("Cached workbook for %s was evicted; refetching", url)
+                return fetch_workbook(url, max_bytes)
+            logger.info("Workbook at %s not modified; using cached copy", url)
+            return cached
+        resp.raise_for_status()
+        length = resp.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > limit:
+            raise ValueError(f"download exceeds {limit} bytes")
+        digest = hashlib.sha256()
+        size = 0
+        tmp = CACHE_DIR / f".{uuid.uuid4().hex}.part"
+        try:
+            with tmp.open("wb") as f:
+                for chunk in resp.iter_bytes(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > limit:
+                        raise ValueError(f"download exceeds {limit} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+            suffix = Path(urlparse(url).path).suffix or ".xlsx"
+            blob = f"{digest.hexdigest()}{suffix}"
+            os.replace(tmp, CACHE_DIR / blob)
+        finally:
+            tmp.unlink(missing_ok=True)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+    logger.info("Downloaded %d bytes from %s", size, url)
+    _write_meta(
+        url,
+        {
+            "url": url,
+            "blob": blob,
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+        },
+    )
+    prune_cache(keep=blob)
+    return CACHE_DIR / blob
+
+
+def prune_cache(
+    max_bytes: int | None = None,
+    keep: str | None = None,
+    min_age: float | None = None,
+) -> None:
+    """Evict cached blobs, oldest first, until the cache fits in ``max_bytes``.
+
+    Blobs that no URL metadata points to (left behind when a source changed)
+    go first. Referenced blobs, and their metadata, are evicted only if that
+    is not enough. ``keep`` names a blob that is never evicted, and blobs
+    modified in the last ``min_age`` seconds are skipped because another
+    worker may be about to read them.
+    """
+    limit = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    cutoff = time.time() - (CACHE_MIN_AGE if min_age is None else min_age)
+    blobs: list[tuple[Path, os.stat_result]] = []
+    for path in CACHE_DIR.iterdir():
+        if path.suffix == ".part" or not path.is_file():
+            continue
+        try:
+            blobs.append((path, path.stat()))
+        except FileNotFoundError:  # evicted concurrently by another worker
+            continue
+    total = sum(st.st_size for _, st in blobs)
+    if total <= limit:
+        return
+    referenced: dict[str, list[Path]] = {}
+    meta_dir = CACHE_DIR / "urls"
+    if meta_dir.is_dir():
+        for meta_path in meta_dir.glob("*.json"):
+            try:
+                blob = json.loads(meta_path.read_text()).get("blob", "")
+            except ValueError:
+                continue
+            referenced.setdefault(blob, []).append(meta_path)
+    candidates = sorted(
+        ((p, st) for p, st in blobs if p.name != keep and st.st_mtime < cutoff),
+        key=lambda item: (item[0].name in referenced, item[1].st_mtime),
+    )
+    for path, st in candidates:
+        if total <= limit:
+            break
+        size = st.st_size
+        for meta_path in referenced.get(path.name, []):
+            meta_path.unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
+        total -= size
+        logger.info("Evicted cached download %s (%d bytes)", path.name, size)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import csv
+import io
+from collections.abc import Iterator
+from sqlite3 import Connection
+from typing import IO
+
+ENRICH_COLUMNS = [
+    "sector_code",
+    "sector_name",
+    "group_code",
+    "group_name",
+    "industry_code",
+    "industry_name",
+]
+
+CHUNK_ROWS = 10_000
+
+
+def build_lookup(conn: Connection, version_id: int) -> dict[str, tuple[str, ...]]:
+    """Return ``code8 -> (sector code/name, group code/name, industry code/name)``."""
+    cur = conn.execute(
+        """
+        SELECT s.code8, sec.code2, sec.name, g.code4, g.name, i.code6, i.name
+        FROM gics_sub_industry s
+        JOIN gics_industry i
+          ON i.code6 = s.industry_code6 AND i.version_id = s.version_id
+        JOIN gics_group g
+          ON g.code4 = i.group_code4 AND g.version_id = i.version_id
+        JOIN gics_sector sec
+          ON sec.code2 = g.sector_code2 AND sec.version_id = g.version_id
+        WHERE s.version_id=?
+        """,
+        (version_id,),
+    )
+    return {row[0]: tuple(row[1:]) for row in cur}
+
+
+def open_csv(raw: IO[bytes]) -> Iterator[list[str]]:
+    # Undecodable bytes become U+FFFD rather than failing after the 200 is sent.
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+    return csv.reader(text)
+
+
+def enrich_rows(
+    reader: Iterator[list[str]],
+    header: list[str],
+    code_index: int,
+    lookup: dict[str, tuple[str, ...]],
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[str]:
+    """Yield CSV text chunks of ``reader`` rows with the ancestry columns appended.
+
+    Rows are padded or truncated to the header width so the appended columns
+    always line up. Only ``chunk_rows`` rows are held in memory at a time.
+    """
+    missing = ("",) * len(ENRICH_COLUMNS)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header + ENRICH_COLUMNS)
+    get = lookup.get
+    width = len(header)
+    pending: list[list[str]] = []
+    for row in reader:
+        if len(row) < width:
+            row.extend([""] * (width - len(row)))
+        elif len(row) > width:
+            del row[width:]
+        code = row[code_index].strip()
+        row.extend(get(code, missing))
+        pending.append(row)
+        if len(pending) >= chunk_rows:
+            writer.writerows(pending)
+            pending.clear()
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    writer.writerows(pending)
+    yield buf.getvalue()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from sqlite3 import Connection
+from typing import Any, Generic, TypeVar
+
+from .db import connect_read, snapshot_key
+
+# level -> (table, code column, parent code column)
+LEVELS: dict[str, tuple[str, str, str | None]] = {
+    "sector": ("gics_sector", "code2", None),
+    "group": ("gics_group", "code4", "sector_code2"),
+    "industry": ("gics_industry", "code6", "group_code4"),
+    "subindustry": ("gics_sub_industry", "code8", "industry_code6"),
+}
+
+Node = tuple[str, str, str | None]
+T = TypeVar("T")
+
+
+def load_nodes(conn: Connection, version_id: int) -> dict[str, Node]:
+    """Return ``code -> (level, name, parent_code)`` for every node of a version."""
+    nodes: dict[str, Node] = {}
+    for level, (table, code_col, parent_col) in LEVELS.items():
+        parent_expr = parent_col or "NULL"
+        cur = conn.execute(
+            f"SELECT {code_col}, name, {parent_expr} FROM {table} WHERE version_id=?",
+            (version_id,),
+        )
+        for code, name, parent in cur:
+            nodes[code] = (level, name, parent)
+    return nodes
+
+
+def ancestry(nodes: dict[str, Node], code: str) -> list[dict[str, Any]] | None:
+    """Return the path from the sector down to ``code``, or None if unknown."""
+    if code not in nodes:
+        return None
+    path: list[dict[str, Any]] = []
+    current: str | None = code
+    while current is not None and current in nodes:
+        level, name, parent = nodes[current]
+        path.append({"level": level, "code": current, "name": name})
+        current = parent
+    path.reverse()
+    return path
+
+
+class SnapshotCache(Generic[T]):
+    """Per-version values built from ``load_nodes``, rebuilt after each publish."""
+
+    def __init__(self, build: Callable[[dict[str, Node]], T]) -> None:
+        self._build = build
+        self._cache: dict[int, tuple[Any, T]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, version_id: int) -> T:
+        key = snapshot_key()
+        cached = self._cache.get(version_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        with self._lock:
+            cached = self._cache.get(version_id)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            # Opened after reading the key, so the value is never older than it.
+            conn = connect_read()
+            try:
+                value = self._build(load_nodes(conn, version_id))
+            finally:
+                conn.close()
+            self._cache[version_id] = (key, value)
+        return value
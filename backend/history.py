@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import date
+from sqlite3 import Connection, Row
+from typing import Any
+
+from .dates import parse_date
+from .hierarchy import LEVELS
+
+# code length -> level, e.g. 6 -> "industry"
+_LEVEL_BY_LENGTH = {
+    int(code_col[4:]): level for level, (_, code_col, _) in LEVELS.items()
+}
+
+
+def _version_order(version: Row) -> tuple[bool, date, int]:
+    start = parse_date(version["effective_date"])
+    return (start is None, start or date.max, version["id"])
+
+
+def code_history(conn: Connection, code: str) -> list[dict[str, Any]] | None:
+    """Return the versions in which ``code`` was added, changed or removed.
+
+    Rows come from a single query on the level's ``(code, version_id)``
+    primary key, so the cost does not grow with the size of each version.
+    Returns None if the code never appears.
+    """
+    level = _LEVEL_BY_LENGTH.get(len(code))
+    if level is None or not code.isdigit():
+        raise ValueError("code must be 2, 4, 6 or 8 digits")
+    table, code_col, parent_col = LEVELS[level]
+    fields = ["name"]
+    columns = ["name"]
+    if parent_col:
+        fields.append("parent")
+        columns.append(parent_col)
+    if level == "subindustry":
+        fields.append("definition")
+        columns.append("definition")
+    rows = conn.execute(
+        f"SELECT version_id, {', '.join(columns)} FROM {table} WHERE {code_col}=?",
+        (code,),
+    ).fetchall()
+    if not rows:
+        return None
+    by_version = {row[0]: tuple(row[1:]) for row in rows}
+    versions = conn.execute(
+        "SELECT id, label, effective_date FROM gics_version"
+    ).fetchall()
+    # Same order as point-in-time classification: by parsed effective date,
+    # with the later-ingested version last on a tie. Versions without a usable
+    # date are never in force there, so they go at the end in ingest order.
+    versions.sort(key=_version_order)
+
+    timeline: list[dict[str, Any]] = []
+    previous: tuple[Any, ...] | None = None
+    for version in versions:
+        current = by_version.get(version["id"])
+        if current == previous:
+            continue
+        entry: dict[str, Any] = {
+            "version_id": version["id"],
+            "label": version["label"],
+            "effective_date": version["effective_date"],
+        }
+        if current is None:
+            entry["change"] = "removed"
+        else:
+            entry["change"] = "added" if previous is None else "changed"
+            entry.update(zip(fields, current))
+            if previous is not None:
+                entry["changed_fields"] = [
+                    f for f, old, new in zip(fields, previous, current) if old != new
+                ]
+        timeline.append(entry)
+        previous = current
+    return timeline
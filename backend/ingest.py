@@ -7,7 +7,7 @@ from typing import Any
 
 import pandas as pd
 
-from .db import get_conn
+from .db import get_conn, intern_text, publish_snapshot
 
 
 logger = logging.getLogger(__name__)
@@ -36,18 +36,23 @@ def load_sample(
         inserted_groups: set[str] = set()
         inserted_industries: set[str] = set()
         inserted_subs: set[str] = set()
+        texts: dict[str, int] = {}
         for r in rows:
             conn.execute(
-                "INSERT OR IGNORE INTO gics_sector(code2, name, version_id) VALUES (?,?,?)",
-                (r["sector_code"], r["sector_name"], version_id),
+                "INSERT OR IGNORE INTO gics_sector_node(code2, name_id, version_id) VALUES (?,?,?)",
+                (
+                    r["sector_code"],
+                    intern_text(conn, r["sector_name"], texts),
+                    version_id,
+                ),
             )
             if r["sector_code"] not in inserted_sectors:
                 inserted_sectors.add(r["sector_code"])
             conn.execute(
-                "INSERT OR IGNORE INTO gics_group(code4, name, sector_code2, version_id) VALUES (?,?,?,?)",
+                "INSERT OR IGNORE INTO gics_group_node(code4, name_id, sector_code2, version_id) VALUES (?,?,?,?)",
                 (
                     r["group_code"],
-                    r["group_name"],
+                    intern_text(conn, r["group_name"], texts),
                     r["sector_code"],
                     version_id,
                 ),
@@ -55,10 +60,10 @@ def load_sample(
             if r["group_code"] not in inserted_groups:
                 inserted_groups.add(r["group_code"])
             conn.execute(
-                "INSERT OR IGNORE INTO gics_industry(code6, name, group_code4, version_id) VALUES (?,?,?,?)",
+                "INSERT OR IGNORE INTO gics_industry_node(code6, name_id, group_code4, version_id) VALUES (?,?,?,?)",
                 (
                     r["industry_code"],
-                    r["industry_name"],
+                    intern_text(conn, r["industry_name"], texts),
                     r["group_code"],
                     version_id,
                 ),
@@ -66,17 +71,18 @@ def load_sample(
             if r["industry_code"] not in inserted_industries:
                 inserted_industries.add(r["industry_code"])
             conn.execute(
-                "INSERT OR IGNORE INTO gics_sub_industry(code8, name, definition, industry_code6, version_id) VALUES (?,?,?,?,?)",
+                "INSERT OR IGNORE INTO gics_sub_industry_node(code8, name_id, definition_id, industry_code6, version_id) VALUES (?,?,?,?,?)",
                 (
                     r["sub_code"],
-                    r["sub_name"],
-                    r.get("definition"),
+                    intern_text(conn, r["sub_name"], texts),
+                    intern_text(conn, r.get("definition"), texts),
                     r["industry_code"],
                     version_id,
                 ),
             )
             if r["sub_code"] not in inserted_subs:
                 inserted_subs.add(r["sub_code"])
+    publish_snapshot()
     logger.info(
         "Sample ingest completed for version_id=%s (sectors=%d, groups=%d, industries=%d, sub_industries=%d)",
         version_id,
@@ -239,13 +245,14 @@ def load_from_excel(
         inserted_groups: set[str] = set()
         inserted_industries: set[str] = set()
         inserted_subs: set[str] = set()
+        texts: dict[str, int] = {}
         for r in records:
             sec_code = r.get("sector_code")
             sec_name = _clean(r.get("sector_name"))
             if sec_code and sec_name and sec_code not in inserted_sectors:
                 conn.execute(
-                    "INSERT OR IGNORE INTO gics_sector(code2, name, version_id) VALUES (?,?,?)",
-                    (sec_code, sec_name, version_id),
+                    "INSERT OR IGNORE INTO gics_sector_node(code2, name_id, version_id) VALUES (?,?,?)",
+                    (sec_code, intern_text(conn, sec_name, texts), version_id),
                 )
                 inserted_sectors.add(sec_code)
 
@@ -258,8 +265,13 @@ def load_from_excel(
                 else:
                     if grp_code not in inserted_groups:
                         conn.execute(
-                            "INSERT OR IGNORE INTO gics_group(code4, name, sector_code2, version_id) VALUES (?,?,?,?)",
-                            (grp_code, grp_name, parent_sec, version_id),
+                            "INSERT OR IGNORE INTO gics_group_node(code4, name_id, sector_code2, version_id) VALUES (?,?,?,?)",
+                            (
+                                grp_code,
+                                intern_text(conn, grp_name, texts),
+                                parent_sec,
+                                version_id,
+                            ),
                         )
                         inserted_groups.add(grp_code)
 
@@ -281,8 +293,13 @@ def load_from_excel(
                 else:
                     if ind_code not in inserted_industries:
                         conn.execute(
-                            "INSERT OR IGNORE INTO gics_industry(code6, name, group_code4, version_id) VALUES (?,?,?,?)",
-                            (ind_code, ind_name, parent_grp, version_id),
+                            "INSERT OR IGNORE INTO gics_industry_node(code6, name_id, group_code4, version_id) VALUES (?,?,?,?)",
+                            (
+                                ind_code,
+                                intern_text(conn, ind_name, texts),
+                                parent_grp,
+                                version_id,
+                            ),
                         )
                         inserted_industries.add(ind_code)
 
@@ -305,8 +322,14 @@ def load_from_excel(
                 else:
                     if sub_code not in inserted_subs:
                         conn.execute(
-                            "INSERT OR IGNORE INTO gics_sub_industry(code8, name, definition, industry_code6, version_id) VALUES (?,?,?,?,?)",
-                            (sub_code, sub_name, definition, parent_ind, version_id),
+                            "INSERT OR IGNORE INTO gics_sub_industry_node(code8, name_id, definition_id, industry_code6, version_id) VALUES (?,?,?,?,?)",
+                            (
+                                sub_code,
+                                intern_text(conn, sub_name, texts),
+                                intern_text(conn, definition, texts),
+                                parent_ind,
+                                version_id,
+                            ),
                         )
                         inserted_subs.add(sub_code)
         logger.info(
@@ -317,4 +340,5 @@ def load_from_excel(
             len(inserted_industries),
             len(inserted_subs),
         )
+    publish_snapshot()
     return version_id
@@ -2,21 +2,34 @@ from __future__ import annotations
 
 import csv
 import logging
-import tempfile
 from io import StringIO
 from pathlib import Path
 from typing import Any
 
 import httpx
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Request, UploadFile
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
-from .db import get_conn, init_db
+from .classify import classify_as_of
+from .db import get_conn, get_read_conn, init_db, snapshot_key
+from .download import fetch_workbook
+from .enrich import build_lookup, enrich_rows, open_csv
+from .history import code_history
 from .ingest import load_from_excel
+from .responses import (
+    FastJSONResponse,
+    encode,
+    encoded_response,
+    raw_response,
+    wants_msgpack,
+)
+from .rollup import get_index as get_rollup_index
+from .rollup import rollup
+from .suggest import get_index
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 logger = logging.getLogger(__name__)
 
@@ -31,29 +44,19 @@ DEFAULT_EFFECTIVE_DATE = "2023-03-17"
 
 def _ingest_workbook_from_url(url: str, label: str, effective_date: str) -> int:
     logger.info(
-        "Downloading workbook from %s for label=%s (effective=%s)",
+        "Fetching workbook from %s for label=%s (effective=%s)",
         url,
         label,
         effective_date,
     )
-    with httpx.Client() as client:
-        resp = client.get(url)
-        resp.raise_for_status()
-    logger.info("Downloaded %d bytes from %s", len(resp.content), url)
-    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
-        tmp.write(resp.content)
-        tmp_path = Path(tmp.name)
-    logger.debug("Saved temporary workbook to %s", tmp_path)
-    try:
-        version_id = load_from_excel(tmp_path, label, effective_date, url)
-        logger.info(
-            "Workbook ingest completed for label=%s version_id=%s",
-            label,
-            version_id,
-        )
-    finally:
-        tmp_path.unlink(missing_ok=True)
-        logger.debug("Removed temporary workbook %s", tmp_path)
+    path = fetch_workbook(url)
+    logger.debug("Using cached workbook %s", path)
+    version_id = load_from_excel(path, label, effective_date, url)
+    logger.info(
+        "Workbook ingest completed for label=%s version_id=%s",
+        label,
+        version_id,
+    )
     return version_id
 
 
@@ -84,12 +87,12 @@ def startup() -> None:
 
 
 @app.get("/api/versions")
-def get_versions() -> list[dict[str, Any]]:
-    with get_conn() as conn:
+def get_versions(request: Request) -> Response:
+    with get_read_conn() as conn:
         cur = conn.execute(
             "SELECT id, label, effective_date FROM gics_version ORDER BY id"
         )
-        return [dict(row) for row in cur.fetchall()]
+        return encoded_response(request, [dict(row) for row in cur.fetchall()])
 
 
 class IngestURL(BaseModel):
@@ -113,12 +116,26 @@ def ingest_url(payload: IngestURL) -> dict[str, int]:
     except httpx.HTTPError as exc:  # pragma: no cover - network failure
         logger.exception("Download failed for %s", payload.url)
         raise HTTPException(status_code=400, detail="download failed") from exc
+    except ValueError as exc:
+        logger.exception("Ingest failed for %s", payload.url)
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     return {"version_id": version_id}
 
 
+# (version_id, msgpack?) -> (snapshot key, encoded tree)
+_tree_cache: dict[tuple[int, bool], tuple[Any, bytes]] = {}
+
+
 @app.get("/api/tree/{version_id}")
-def get_tree(version_id: int) -> list[dict[str, Any]]:
-    with get_conn() as conn:
+def get_tree(version_id: int, request: Request) -> Response:
+    as_msgpack = wants_msgpack(request)
+    # Read the key before opening the connection so a cached body is never
+    # tagged with a snapshot newer than the one it was built from.
+    key = snapshot_key()
+    cached = _tree_cache.get((version_id, as_msgpack))
+    if cached is not None and key is not None and cached[0] == key:
+        return raw_response(cached[1], as_msgpack)
+    with get_read_conn() as conn:
         cur = conn.execute("SELECT id FROM gics_version WHERE id=?", (version_id,))
         if cur.fetchone() is None:
             raise HTTPException(status_code=404, detail="version not found")
@@ -164,7 +181,84 @@ def get_tree(version_id: int) -> list[dict[str, Any]]:
             result.append(
                 {"code": sec["code2"], "name": sec["name"], "groups": group_list}
             )
-        return result
+    body = encode(result, as_msgpack)
+    if key is not None:
+        _tree_cache[(version_id, as_msgpack)] = (key, body)
+    return raw_response(body, as_msgpack)
+
+
+class ClassifyRequest(BaseModel):
+    codes: list[str]
+    as_of_dates: list[str]
+
+
+@app.post("/api/classify")
+def classify(payload: ClassifyRequest, request: Request) -> Response:
+    with get_read_conn() as conn:
+        try:
+            results = classify_as_of(conn, payload.codes, payload.as_of_dates)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return encoded_response(request, results)
+
+
+@app.post("/api/enrich/{version_id}")
+def enrich(version_id: int, file: UploadFile, code_column: str = "sub_code"):
+    with get_read_conn() as conn:
+        cur = conn.execute("SELECT id FROM gics_version WHERE id=?", (version_id,))
+        if cur.fetchone() is None:
+            raise HTTPException(status_code=404, detail="version not found")
+        lookup = build_lookup(conn, version_id)
+    reader = open_csv(file.file)
+    header = next(reader, None)
+    if header is None or code_column not in header:
+        raise HTTPException(status_code=400, detail=f"missing column {code_column!r}")
+    return StreamingResponse(
+        enrich_rows(reader, header, header.index(code_column), lookup),
+        media_type="text/csv",
+    )
+
+
+@app.get("/api/suggest")
+def suggest(q: str, version_id: int, request: Request, limit: int = 10) -> Response:
+    with get_read_conn() as conn:
+        cur = conn.execute("SELECT id FROM gics_version WHERE id=?", (version_id,))
+        if cur.fetchone() is None:
+            raise HTTPException(status_code=404, detail="version not found")
+    hits = get_index(version_id).search(q, max(1, min(limit, 50)))
+    return encoded_response(request, hits)
+
+
+class RollupRequest(BaseModel):
+    codes: list[str]
+    weights: list[float]
+
+
+@app.post("/api/rollup/{version_id}")
+def rollup_weights(
+    version_id: int, payload: RollupRequest, request: Request
+) -> Response:
+    with get_read_conn() as conn:
+        cur = conn.execute("SELECT id FROM gics_version WHERE id=?", (version_id,))
+        if cur.fetchone() is None:
+            raise HTTPException(status_code=404, detail="version not found")
+    try:
+        result = rollup(get_rollup_index(version_id), payload.codes, payload.weights)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return encoded_response(request, result)
+
+
+@app.get("/api/history/{code}")
+def get_history(code: str, request: Request) -> Response:
+    with get_read_conn() as conn:
+        try:
+            timeline = code_history(conn, code)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="code not found")
+    return encoded_response(request, timeline)
 
 
 @app.get("/api/export/{version_id}/{level}")
@@ -181,7 +275,7 @@ def export_level(version_id: int, level: str):
     if level not in levels:
         raise HTTPException(status_code=400, detail="invalid level")
     table, cols = levels[level]
-    with get_conn() as conn:
+    with get_read_conn() as conn:
         cur = conn.execute("SELECT id FROM gics_version WHERE id=?", (version_id,))
         if cur.fetchone() is None:
             raise HTTPException(status_code=404, detail="version not found")
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - exercised only without msgpack
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ACCEPT = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when available; bytes pass through."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def _accept_ranges(header: str) -> list[tuple[str, float]]:
+    ranges: list[tuple[str, float]] = []
+    for part in header.split(","):
+        media, *params = (p.strip() for p in part.split(";"))
+        if not media:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media.lower(), q))
+    return ranges
+
+
+def _quality(ranges: list[tuple[str, float]], media_types: tuple[str, ...]) -> float:
+    # The most specific matching range decides, e.g. "application/json"
+    # overrides "application/*", which overrides "*/*".
+    for candidates in (media_types, ("application/*",), ("*/*",)):
+        matches = [q for media, q in ranges if media in candidates]
+        if matches:
+            return max(matches)
+    return 0.0
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Return True only if the client prefers msgpack strictly over JSON."""
+    if msgpack is None:
+        return False
+    accept = request.headers.get("accept")
+    if not accept:
+        return False
+    ranges = _accept_ranges(accept)
+    packed = _quality(ranges, _MSGPACK_ACCEPT)
+    return packed > 0 and packed > _quality(ranges, ("application/json",))
+
+
+def encode(content: Any, as_msgpack: bool) -> bytes:
+    if as_msgpack:
+        return msgpack.packb(content)
+    return dumps(content)
+
+
+def encoded_response(request: Request, content: Any) -> Response:
+    """Encode ``content`` for the client's ``Accept`` header, skipping validation."""
+    as_msgpack = wants_msgpack(request)
+    return raw_response(encode(content, as_msgpack), as_msgpack)
+
+
+def raw_response(body: bytes, as_msgpack: bool) -> Response:
+    # The body depends on Accept, so shared caches must key on it too.
+    headers = {"Vary": "Accept"}
+    if as_msgpack:
+        return Response(body, media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return FastJSONResponse(body, headers=headers)
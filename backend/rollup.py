@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from .hierarchy import LEVELS, Node, SnapshotCache
+
+# child level -> parent level, leaf first
+_PARENTS = {"subindustry": "industry", "industry": "group", "group": "sector"}
+
+
+class RollupIndex:
+    """Sorted code arrays per level plus each node's position in its parent level."""
+
+    def __init__(self, nodes: dict[str, Node]) -> None:
+        by_level: dict[str, list[str]] = {level: [] for level in LEVELS}
+        for code, (level, _, _) in nodes.items():
+            by_level[level].append(code)
+        self.codes = {
+            level: np.array(sorted(c), dtype=str) for level, c in by_level.items()
+        }
+        self.names = {
+            level: [nodes[c][1] for c in self.codes[level]] for level in LEVELS
+        }
+        self.parent: dict[str, np.ndarray] = {}
+        for child, parent in _PARENTS.items():
+            parent_codes = np.array([nodes[c][2] for c in self.codes[child]], dtype=str)
+            self.parent[child] = np.searchsorted(self.codes[parent], parent_codes)
+
+
+def rollup(
+    index: RollupIndex,
+    codes: Sequence[str] | np.ndarray,
+    weights: Sequence[float] | np.ndarray,
+) -> dict[str, Any]:
+    """Aggregate sub-industry ``weights`` to every level of the hierarchy.
+
+    Codes are matched with one ``searchsorted`` over the sorted sub-industry
+    array and summed with ``bincount``; each higher level is then a
+    ``bincount`` of the level below through the precomputed parent index, so
+    the cost per input row is independent of the hierarchy depth.
+    """
+    codes = np.asarray(codes, dtype=str)
+    weights = np.asarray(weights, dtype=np.float64)
+    if codes.shape != weights.shape or codes.ndim != 1:
+        raise ValueError("codes and weights must be 1-d arrays of the same length")
+
+    subs = index.codes["subindustry"]
+    if len(subs) and len(codes):
+        pos = np.minimum(np.searchsorted(subs, codes), len(subs) - 1)
+        matched = subs[pos] == codes
+    else:
+        pos = np.zeros(len(codes), dtype=np.intp)
+        matched = np.zeros(len(codes), dtype=bool)
+
+    totals = {
+        "subindustry": np.bincount(pos[matched], weights[matched], minlength=len(subs))
+    }
+    counts = {"subindustry": np.bincount(pos[matched], minlength=len(subs))}
+    for child, parent in _PARENTS.items():
+        size = len(index.codes[parent])
+        totals[parent] = np.bincount(index.parent[child], totals[child], minlength=size)
+        counts[parent] = np.bincount(index.parent[child], counts[child], minlength=size)
+
+    result: dict[str, Any] = {}
+    for level in LEVELS:
+        present = np.flatnonzero(counts[level])
+        level_codes = index.codes[level]
+        names = index.names[level]
+        result[level] = [
+            {
+                "code": str(level_codes[i]),
+                "name": names[i],
+                "weight": float(totals[level][i]),
+            }
+            for i in present
+        ]
+    result["unmatched_weight"] = float(weights[~matched].sum())
+    result["unmatched_count"] = int(len(codes) - matched.sum())
+    return result
+
+
+_indexes = SnapshotCache(RollupIndex)
+
+
+def get_index(version_id: int) -> RollupIndex:
+    return _indexes.get(version_id)
@@ -6,38 +6,65 @@ CREATE TABLE IF NOT EXISTS gics_version(
   checksum TEXT
 );
 
-CREATE TABLE IF NOT EXISTS gics_sector(
+-- Names and definitions are interned once and shared by every version that
+-- uses them; digest is the SHA-256 of body.
+CREATE TABLE IF NOT EXISTS gics_text(
+  id INTEGER PRIMARY KEY,
+  digest BLOB NOT NULL UNIQUE,
+  body TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS gics_sector_node(
   code2 TEXT NOT NULL,
-  name TEXT NOT NULL,
+  name_id INTEGER NOT NULL REFERENCES gics_text(id),
   version_id INTEGER NOT NULL,
   PRIMARY KEY(code2, version_id),
   FOREIGN KEY(version_id) REFERENCES gics_version(id) ON DELETE CASCADE
 );
 
-CREATE TABLE IF NOT EXISTS gics_group(
+CREATE TABLE IF NOT EXISTS gics_group_node(
   code4 TEXT NOT NULL,
-  name TEXT NOT NULL,
+  name_id INTEGER NOT NULL REFERENCES gics_text(id),
   sector_code2 TEXT NOT NULL,
   version_id INTEGER NOT NULL,
   PRIMARY KEY(code4, version_id),
-  FOREIGN KEY(sector_code2, version_id) REFERENCES gics_sector(code2, version_id) ON DELETE CASCADE
+  FOREIGN KEY(sector_code2, version_id) REFERENCES gics_sector_node(code2, version_id) ON DELETE CASCADE
 );
 
-CREATE TABLE IF NOT EXISTS gics_industry(
+CREATE TABLE IF NOT EXISTS gics_industry_node(
   code6 TEXT NOT NULL,
-  name TEXT NOT NULL,
+  name_id INTEGER NOT NULL REFERENCES gics_text(id),
   group_code4 TEXT NOT NULL,
   version_id INTEGER NOT NULL,
   PRIMARY KEY(code6, version_id),
-  FOREIGN KEY(group_code4, version_id) REFERENCES gics_group(code4, version_id) ON DELETE CASCADE
+  FOREIGN KEY(group_code4, version_id) REFERENCES gics_group_node(code4, version_id) ON DELETE CASCADE
 );
 
-CREATE TABLE IF NOT EXISTS gics_sub_industry(
+CREATE TABLE IF NOT EXISTS gics_sub_industry_node(
   code8 TEXT NOT NULL,
-  name TEXT NOT NULL,
-  definition TEXT,
+  name_id INTEGER NOT NULL REFERENCES gics_text(id),
+  definition_id INTEGER REFERENCES gics_text(id),
   industry_code6 TEXT NOT NULL,
   version_id INTEGER NOT NULL,
   PRIMARY KEY(code8, version_id),
-  FOREIGN KEY(industry_code6, version_id) REFERENCES gics_industry(code6, version_id) ON DELETE CASCADE
+  FOREIGN KEY(industry_code6, version_id) REFERENCES gics_industry_node(code6, version_id) ON DELETE CASCADE
 );
+
+-- Read-side views reconstructing the original per-version rows.
+CREATE VIEW IF NOT EXISTS gics_sector AS
+  SELECT n.code2, t.body AS name, n.version_id
+  FROM gics_sector_node n JOIN gics_text t ON t.id = n.name_id;
+
+CREATE VIEW IF NOT EXISTS gics_group AS
+  SELECT n.code4, t.body AS name, n.sector_code2, n.version_id
+  FROM gics_group_node n JOIN gics_text t ON t.id = n.name_id;
+
+CREATE VIEW IF NOT EXISTS gics_industry AS
+  SELECT n.code6, t.body AS name, n.group_code4, n.version_id
+  FROM gics_industry_node n JOIN gics_text t ON t.id = n.name_id;
+
+CREATE VIEW IF NOT EXISTS gics_sub_industry AS
+  SELECT n.code8, t.body AS name, d.body AS definition, n.industry_code6, n.version_id
+  FROM gics_sub_industry_node n
+  JOIN gics_text t ON t.id = n.name_id
+  LEFT JOIN gics_text d ON d.id = n.definition_id;
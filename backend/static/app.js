@@ -8,6 +8,12 @@ async function fetchTree(id) {
   return res.json();
 }
 
+async function fetchSuggestions(q, id) {
+  const params = new URLSearchParams({ q: q, version_id: id });
+  const res = await fetch(`/api/suggest?${params}`);
+  return res.json();
+}
+
 async function populateVersions(select) {
   select.innerHTML = '';
   const versions = await fetchVersions();
@@ -23,6 +29,7 @@ function renderTree(node, container) {
   const ul = document.createElement('ul');
   for (const item of node) {
     const li = document.createElement('li');
+    li.id = `node-${item.code}`;
     li.textContent = `${item.code} - ${item.name}`;
     if (item.groups) {
       renderTree(item.groups, li);
@@ -47,6 +54,25 @@ async function init() {
   }
   versionSelect.addEventListener('change', loadTree);
   await loadTree();
+  const search = document.getElementById('search');
+  const suggestions = document.getElementById('suggestions');
+  search.addEventListener('input', async () => {
+    const q = search.value.trim();
+    suggestions.innerHTML = '';
+    if (!q) return;
+    const hits = await fetchSuggestions(q, versionSelect.value);
+    if (search.value.trim() !== q) return;
+    hits.forEach(hit => {
+      const li = document.createElement('li');
+      li.textContent = hit.ancestry.map(n => `${n.code} ${n.name}`).join(' > ');
+      li.addEventListener('click', () => {
+        const node = document.getElementById(`node-${hit.code}`);
+        if (node) node.scrollIntoView({ block: 'center' });
+        suggestions.innerHTML = '';
+      });
+      suggestions.appendChild(li);
+    });
+  });
   document.querySelectorAll('button[data-level]').forEach(btn => {
     btn.addEventListener('click', () => {
       const level = btn.dataset.level;
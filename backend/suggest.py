@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import heapq
+import re
+from bisect import bisect_left
+from typing import Any
+
+from .hierarchy import LEVELS, Node, SnapshotCache, ancestry
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_DEPTH = {level: depth for depth, level in enumerate(LEVELS)}
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class PrefixIndex:
+    """Sorted-array prefix index over the codes and name tokens of a version."""
+
+    def __init__(self, nodes: dict[str, Node]) -> None:
+        self.nodes = nodes
+        self.codes = sorted(nodes, key=lambda c: (_DEPTH[nodes[c][0]], c))
+        self.tokens = [set(_tokens(nodes[c][1])) for c in self.codes]
+        entries = sorted(
+            {(code, i) for i, code in enumerate(self.codes)}
+            | {(tok, i) for i, toks in enumerate(self.tokens) for tok in toks}
+        )
+        self.keys = [k for k, _ in entries]
+        self.refs = [i for _, i in entries]
+
+    def _prefix_matches(self, prefix: str) -> set[int]:
+        matches: set[int] = set()
+        pos = bisect_left(self.keys, prefix)
+        keys = self.keys
+        while pos < len(keys) and keys[pos].startswith(prefix):
+            matches.add(self.refs[pos])
+            pos += 1
+        return matches
+
+    def search(self, q: str, limit: int) -> list[dict[str, Any]]:
+        terms = sorted(set(_tokens(q)), key=len, reverse=True)
+        if not terms:
+            return []
+        # Start from the most selective (longest) term, then require the rest.
+        candidates = self._prefix_matches(terms[0])
+        for term in terms[1:]:
+            candidates = {
+                i
+                for i in candidates
+                if self.codes[i].startswith(term)
+                or any(tok.startswith(term) for tok in self.tokens[i])
+            }
+        results = []
+        for i in heapq.nsmallest(limit, candidates):
+            code = self.codes[i]
+            level, name, _ = self.nodes[code]
+            results.append(
+                {
+                    "code": code,
+                    "name": name,
+                    "level": level,
+                    "ancestry": ancestry(self.nodes, code),
+                }
+            )
+        return results
+
+
+_indexes = SnapshotCache(PrefixIndex)
+
+
+def get_index(version_id: int) -> PrefixIndex:
+    return _indexes.get(version_id)
@@ -1,40 +1,175 @@
 from __future__ import annotations
 
 import argparse
+import bz2
 import csv
+import gzip
+import json
+import lzma
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import IO
 
-from backend.db import get_conn
+from backend.db import connect_read
 
+LEVELS = {
+    "sector": ("gics_sector", ["code2", "name"]),
+    "group": ("gics_group", ["code4", "name", "sector_code2"]),
+    "industry": ("gics_industry", ["code6", "name", "group_code4"]),
+    "subindustry": (
+        "gics_sub_industry",
+        ["code8", "name", "definition", "industry_code6"],
+    ),
+}
+FORMATS = ["csv", "jsonl", "parquet"]
+COMPRESSION: dict[str, tuple[str, Callable[..., IO[str]]]] = {
+    "gzip": (".gz", gzip.open),
+    "bz2": (".bz2", bz2.open),
+    "xz": (".xz", lzma.open),
+}
+CHUNK_ROWS = 5_000
 
-def main() -> None:
+
+def _open_text(path: Path, compression: str) -> IO[str]:
+    if compression == "none":
+        return path.open("w", newline="")
+    return COMPRESSION[compression][1](path, "wt", newline="")
+
+
+def _write_csv(cur, cols: list[str], path: Path, compression: str) -> int:
+    count = 0
+    with _open_text(path, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow(cols)
+        while rows := cur.fetchmany(CHUNK_ROWS):
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _write_jsonl(cur, cols: list[str], path: Path, compression: str) -> int:
+    count = 0
+    with _open_text(path, compression) as f:
+        while rows := cur.fetchmany(CHUNK_ROWS):
+            f.writelines(
+                json.dumps(dict(zip(cols, r)), ensure_ascii=False) + "\n" for r in rows
+            )
+            count += len(rows)
+    return count
+
+
+def _write_parquet(cur, cols: list[str], path: Path, compression: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("parquet export requires pyarrow") from exc
+    schema = pa.schema([(c, pa.string()) for c in cols])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        while rows := cur.fetchmany(CHUNK_ROWS):
+            columns = list(zip(*rows))
+            writer.write_batch(
+                pa.record_batch([list(c) for c in columns], schema=schema)
+            )
+            count += len(rows)
+    return count
+
+
+WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def output_name(version_id: int, level: str, fmt: str, compression: str) -> str:
+    name = f"version{version_id}_{level}.{fmt}"
+    if fmt != "parquet" and compression != "none":
+        name += COMPRESSION[compression][0]
+    return name
+
+
+def export_one(
+    version_id: int, level: str, fmt: str, compression: str, path: Path
+) -> tuple[Path, int]:
+    table, cols = LEVELS[level]
+    # Each worker opens its own connection; never share one across processes.
+    conn = connect_read()
+    try:
+        cur = conn.execute(
+            f"SELECT {', '.join(cols)} FROM {table} WHERE version_id=? ORDER BY 1",
+            (version_id,),
+        )
+        return path, WRITERS[fmt](cur, cols, path, compression)
+    finally:
+        conn.close()
+
+
+def _all_versions() -> list[int]:
+    conn = connect_read()
+    try:
+        cur = conn.execute("SELECT id FROM gics_version ORDER BY id")
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def main(argv: list[str] | None = None) -> None:
     p = argparse.ArgumentParser()
-    p.add_argument("--version", type=int, required=True)
     p.add_argument(
-        "--level", choices=["sector", "group", "industry", "subindustry"], required=True
+        "--version",
+        nargs="+",
+        required=True,
+        help="version ids, or 'all'",
     )
-    p.add_argument("--out", type=Path, required=True)
-    args = p.parse_args()
-    levels = {
-        "sector": ("gics_sector", ["code2", "name"]),
-        "group": ("gics_group", ["code4", "name", "sector_code2"]),
-        "industry": ("gics_industry", ["code6", "name", "group_code4"]),
-        "subindustry": (
-            "gics_sub_industry",
-            ["code8", "name", "definition", "industry_code6"],
-        ),
-    }
-    table, cols = levels[args.level]
-    with get_conn() as conn:
-        rows = conn.execute(
-            f"SELECT {', '.join(cols)} FROM {table} WHERE version_id=? ORDER BY 1",
-            (args.version,),
-        ).fetchall()
-    with args.out.open("w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(cols)
-        for r in rows:
-            writer.writerow([r[c] for c in cols])
+    p.add_argument(
+        "--level",
+        nargs="+",
+        choices=[*LEVELS, "all"],
+        required=True,
+    )
+    p.add_argument(
+        "--out",
+        type=Path,
+        required=True,
+        help="output file for a single export, otherwise a directory",
+    )
+    p.add_argument("--format", choices=FORMATS, default="csv")
+    p.add_argument("--compression", choices=["none", *COMPRESSION], default="none")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = p.parse_args(argv)
+
+    if args.format == "parquet" and args.compression not in {"none", "gzip"}:
+        p.error("parquet supports only --compression none or gzip")
+    if "all" in args.version:
+        versions = _all_versions()
+    else:
+        try:
+            versions = sorted({int(v) for v in args.version})
+        except ValueError:
+            p.error("--version takes integer ids or 'all'")
+    levels = list(LEVELS) if "all" in args.level else list(dict.fromkeys(args.level))
+
+    jobs = [(v, level) for v in versions for level in levels]
+    if len(jobs) == 1 and not args.out.is_dir():
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        paths = [args.out]
+    else:
+        if args.out.exists() and not args.out.is_dir():
+            p.error(f"--out {args.out} is a file; several exports need a directory")
+        args.out.mkdir(parents=True, exist_ok=True)
+        paths = [
+            args.out / output_name(v, level, args.format, args.compression)
+            for v, level in jobs
+        ]
+
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(jobs)))) as pool:
+        futures = [
+            pool.submit(export_one, v, level, args.format, args.compression, path)
+            for (v, level), path in zip(jobs, paths)
+        ]
+        for future in futures:
+            path, count = future.result()
+            print(f"{path}: {count} rows")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_CSV = ROOT / "backend" / "sample_gics.csv"
+WORKBOOK = ROOT / "GICS_structure_and_definitions_effective_close_of_March_17_2023.xlsx"
+DEFAULT_SCENARIO = Path(__file__).resolve().parent / "scenarios" / "default.json"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve_workbook() -> tuple[ThreadingHTTPServer, str]:
+    """Serve the bundled workbook locally so ingest steps never hit the network."""
+    handler = partial(_QuietHandler, directory=str(WORKBOOK.parent))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_address[1]}/{WORKBOOK.name}"
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _render(value: Any, params: dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        return value.format_map(params)
+    if isinstance(value, dict):
+        return {k: _render(v, params) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_render(v, params) for v in value]
+    return value
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(
+    samples: list[tuple[str, float, int]], elapsed: float
+) -> dict[str, dict[str, float]]:
+    """Aggregate ``(route, latency seconds, status)`` samples per route."""
+    by_route: dict[str, list[tuple[float, int]]] = {}
+    for name, latency, status in samples:
+        by_route.setdefault(name, []).append((latency, status))
+    report: dict[str, dict[str, float]] = {}
+    for name, rows in sorted(by_route.items()):
+        latencies = sorted(lat * 1000 for lat, _ in rows)
+        report[name] = {
+            "requests": len(rows),
+            "errors": sum(1 for _, status in rows if status >= 400 or status == 0),
+            "rps": len(rows) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+    return report
+
+
+def compare(
+    report: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    max_regression: float,
+) -> list[str]:
+    """Return routes whose p95 latency grew by more than ``max_regression``."""
+    regressions = []
+    for name, stats in report.items():
+        base = baseline.get(name)
+        if not base or not base.get("p95_ms"):
+            continue
+        change = stats["p95_ms"] / base["p95_ms"] - 1
+        if change > max_regression:
+            regressions.append(
+                f"{name}: p95 {base['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms"
+                f" (+{change:.0%})"
+            )
+    return regressions
+
+
+def print_report(
+    report: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]] | None = None,
+) -> None:
+    header = (
+        f"{'route':<12}{'reqs':>8}{'errs':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    )
+    print(header + ("   p95 vs baseline" if baseline else ""))
+    for name, s in report.items():
+        line = (
+            f"{name:<12}{s['requests']:>8}{s['errors']:>6}{s['rps']:>9.1f}"
+            f"{s['p50_ms']:>9.1f}{s['p95_ms']:>9.1f}{s['p99_ms']:>9.1f}"
+        )
+        base = (baseline or {}).get(name)
+        if base and base.get("p95_ms"):
+            line += f"   {s['p95_ms'] / base['p95_ms'] - 1:+.0%}"
+        print(line)
+
+
+async def _run_load(
+    base_url: str, scenario: dict[str, Any], params: dict[str, Any], seed: int
+) -> tuple[list[tuple[str, float, int]], float]:
+    steps = [_render(step, params) for step in scenario["requests"]]
+    weights = [float(step.get("weight", 1)) for step in steps]
+    duration = float(scenario.get("duration", 10))
+    concurrency = int(scenario.get("concurrency", 8))
+    samples: list[tuple[str, float, int]] = []
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=120, limits=limits, trust_env=False
+    ) as client:
+
+        async def worker(rng: random.Random, deadline: float) -> None:
+            while time.perf_counter() < deadline:
+                step = rng.choices(steps, weights)[0]
+                start = time.perf_counter()
+                try:
+                    resp = await client.request(
+                        step.get("method", "GET"), step["path"], json=step.get("json")
+                    )
+                    await resp.aread()
+                    status = resp.status_code
+                except httpx.HTTPError:
+                    status = 0
+                samples.append((step["name"], time.perf_counter() - start, status))
+
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *(worker(random.Random(seed + i), deadline) for i in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def _wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            resp = httpx.get(f"{base_url}/api/versions", timeout=1, trust_env=False)
+        except httpx.HTTPError:
+            pass
+        else:
+            if resp.status_code == 200:
+                return
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def main(argv: list[str] | None = None) -> None:
+    p = argparse.ArgumentParser()
+    p.add_argument("--scenario", type=Path, default=DEFAULT_SCENARIO)
+    p.add_argument("--seed-from", choices=["csv", "excel"], default="csv")
+    p.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    p.add_argument("--duration", type=float, help="override scenario duration")
+    p.add_argument("--concurrency", type=int, help="override scenario concurrency")
+    p.add_argument("--baseline", type=Path, help="compare against a saved report")
+    p.add_argument("--save-baseline", type=Path, help="write this report as JSON")
+    p.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="fail if any route's p95 grows by more than this fraction",
+    )
+    p.add_argument("--random-seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    scenario = json.loads(args.scenario.read_text())
+    if args.duration is not None:
+        scenario["duration"] = args.duration
+    if args.concurrency is not None:
+        scenario["concurrency"] = args.concurrency
+
+    with tempfile.TemporaryDirectory(prefix="gics-loadtest-") as tmp:
+        env = {
+            **os.environ,
+            "GICS_DB_PATH": str(Path(tmp) / "gics.db"),
+            "GICS_CACHE_DIR": str(Path(tmp) / "cache"),
+        }
+        if args.seed_from == "csv":
+            seed_args = ["--csv", str(SAMPLE_CSV)]
+        else:
+            seed_args = ["--excel", str(WORKBOOK)]
+        subprocess.run(
+            [sys.executable, "-m", "scripts.seed", *seed_args]
+            + ["--label", "loadtest-seed", "--effective", "2023-03-17"],
+            cwd=ROOT,
+            env=env,
+            check=True,
+        )
+
+        httpd, workbook_url = _serve_workbook()
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app"]
+            + ["--host", "127.0.0.1", "--port", str(port)]
+            + ["--workers", str(args.workers), "--log-level", "warning"],
+            cwd=ROOT,
+            env=env,
+        )
+        try:
+            _wait_ready(base_url, server)
+            params = {"version_id": 1, "workbook_url": workbook_url}
+            samples, elapsed = asyncio.run(
+                _run_load(base_url, scenario, params, args.random_seed)
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            httpd.shutdown()
+
+    report = summarize(samples, elapsed)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print(
+        f"{len(samples)} requests in {elapsed:.1f}s ({len(samples) / elapsed:.1f} rps)"
+    )
+    print_report(report, baseline)
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2))
+    if baseline is not None:
+        regressions = compare(report, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,43 @@
 from __future__ import annotations
 
 import os
+import tempfile
 from pathlib import Path
 
+import pytest
+
 TEST_DB_DIR = Path(__file__).resolve().parent / "_tmp"
 TEST_DB_DIR.mkdir(parents=True, exist_ok=True)
 os.environ.setdefault("GICS_DB_PATH", str(TEST_DB_DIR / "gics.db"))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def download_cache():
+    from backend import download
+
+    original = download.CACHE_DIR
+    with tempfile.TemporaryDirectory(prefix="gics-cache-") as tmp:
+        download.CACHE_DIR = Path(tmp)
+        yield download.CACHE_DIR
+    download.CACHE_DIR = original
+
+
+@pytest.fixture(autouse=True, scope="session")
+def snapshot_lock():
+    from backend.db import SNAPSHOT_LOCK_PATH
+
+    yield
+    SNAPSHOT_LOCK_PATH.unlink(missing_ok=True)
+
+
+@pytest.fixture
+def fresh_db():
+    from backend.db import DB_PATH, SNAPSHOT_PATH, init_db
+
+    if DB_PATH.exists():
+        DB_PATH.unlink()
+    init_db()
+    yield
+    if DB_PATH.exists():
+        DB_PATH.unlink()
+    SNAPSHOT_PATH.unlink(missing_ok=True)
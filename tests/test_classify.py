@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from backend.classify import classify_as_of
+from backend.db import get_conn
+from backend.ingest import load_sample
+from backend.main import app
+
+pytestmark = pytest.mark.usefixtures("fresh_db")
+
+
+def test_classify_picks_version_in_force(tmp_path):
+    sample = Path("backend/sample_gics.csv")
+    renamed = tmp_path / "renamed.csv"
+    renamed.write_text(
+        sample.read_text().replace("10101010,Oil & Gas Drilling", "10101010,Renamed")
+    )
+    v1 = load_sample(sample, "old", "2020-01-01")
+    v2 = load_sample(renamed, "new", "2023-03-17")
+    with get_conn() as conn:
+        results = classify_as_of(
+            conn,
+            ["10101010", "10101010", "10101010", "99999999", "10101010"],
+            ["2019-12-31", "2021-06-30", "2023-03-17", "2024-01-01", "not-a-date"],
+        )
+    assert [r["version_id"] for r in results] == [None, v1, v2, v2, None]
+    assert [r["error"] for r in results] == [
+        "no version effective",
+        None,
+        None,
+        "code not found",
+        "invalid date",
+    ]
+    assert [n["code"] for n in results[1]["ancestry"]] == [
+        "10",
+        "1010",
+        "101010",
+        "10101010",
+    ]
+    assert results[1]["ancestry"][-1]["name"] == "Oil & Gas Drilling"
+    assert results[2]["ancestry"][-1]["name"] == "Renamed"
+
+
+def test_classify_endpoint():
+    load_sample(Path("backend/sample_gics.csv"), "sample", "2024-01-01")
+
+    async def inner() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            r = await client.post(
+                "/api/classify",
+                json={"codes": ["151010"], "as_of_dates": ["2024-05-01"]},
+            )
+            assert r.status_code == 200
+            assert [n["level"] for n in r.json()[0]["ancestry"]] == [
+                "sector",
+                "group",
+                "industry",
+            ]
+            r = await client.post(
+                "/api/classify", json={"codes": ["10"], "as_of_dates": []}
+            )
+            assert r.status_code == 400
+
+    asyncio.run(inner())
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from backend import db
+from backend.db import DB_PATH, get_conn, get_read_conn, init_db
+from backend.ingest import load_sample
+
+pytestmark = pytest.mark.usefixtures("fresh_db")
+
+# schema.sql as it was before names and definitions moved into gics_text.
+LEGACY_SCHEMA = """
+CREATE TABLE gics_version(
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  label TEXT NOT NULL,
+  effective_date TEXT,
+  source_url TEXT,
+  checksum TEXT
+);
+
+CREATE TABLE gics_sector(
+  code2 TEXT NOT NULL,
+  name TEXT NOT NULL,
+  version_id INTEGER NOT NULL,
+  PRIMARY KEY(code2, version_id),
+  FOREIGN KEY(version_id) REFERENCES gics_version(id) ON DELETE CASCADE
+);
+
+CREATE TABLE gics_group(
+  code4 TEXT NOT NULL,
+  name TEXT NOT NULL,
+  sector_code2 TEXT NOT NULL,
+  version_id INTEGER NOT NULL,
+  PRIMARY KEY(code4, version_id),
+  FOREIGN KEY(sector_code2, version_id) REFERENCES gics_sector(code2, version_id) ON DELETE CASCADE
+);
+
+CREATE TABLE gics_industry(
+  code6 TEXT NOT NULL,
+  name TEXT NOT NULL,
+  group_code4 TEXT NOT NULL,
+  version_id INTEGER NOT NULL,
+  PRIMARY KEY(code6, version_id),
+  FOREIGN KEY(group_code4, version_id) REFERENCES gics_group(code4, version_id) ON DELETE CASCADE
+);
+
+CREATE TABLE gics_sub_industry(
+  code8 TEXT NOT NULL,
+  name TEXT NOT NULL,
+  definition TEXT,
+  industry_code6 TEXT NOT NULL,
+  version_id INTEGER NOT NULL,
+  PRIMARY KEY(code8, version_id),
+  FOREIGN KEY(industry_code6, version_id) REFERENCES gics_industry(code6, version_id) ON DELETE CASCADE
+);
+"""
+
+
+def test_readers_switch_to_new_snapshot_after_ingest():
+    reader = get_read_conn()
+    assert reader.execute("SELECT COUNT(*) FROM gics_version").fetchone()[0] == 0
+    assert get_read_conn() is reader
+
+    vid = load_sample(Path("backend/sample_gics.csv"), "sample", "2024-01-01")
+    fresh = get_read_conn()
+    assert fresh is not reader
+    cur = fresh.execute("SELECT id FROM gics_version")
+    assert [r["id"] for r in cur.fetchall()] == [vid]
+
+
+def test_snapshot_is_read_only_and_isolated_from_staging():
+    load_sample(Path("backend/sample_gics.csv"), "sample", "2024-01-01")
+    reader = get_read_conn()
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("DELETE FROM gics_version")
+    with get_conn() as conn:
+        conn.execute("UPDATE gics_version SET label='changed'")
+    label = get_read_conn().execute("SELECT label FROM gics_version").fetchone()[0]
+    assert label == "sample"
+
+
+def test_concurrent_publishes_keep_the_newest_snapshot(monkeypatch):
+    load_sample(Path("backend/sample_gics.csv"), "v1", "2024-01-01")
+    fsync = db._fsync
+    backed_up = threading.Event()
+
+    def slow_fsync(path: Path) -> None:
+        # Stall the first publish after its backup, before its rename.
+        if threading.current_thread().name == "slow" and not backed_up.is_set():
+            backed_up.set()
+            time.sleep(0.5)
+        fsync(path)
+
+    monkeypatch.setattr(db, "_fsync", slow_fsync)
+    slow = threading.Thread(target=db.publish_snapshot, name="slow")
+    slow.start()
+    assert backed_up.wait(5)
+    with get_conn() as conn:
+        conn.execute("INSERT INTO gics_version(label) VALUES ('v2')")
+    db.publish_snapshot()
+    slow.join()
+    reader = db.connect_read()
+    try:
+        labels = [row[0] for row in reader.execute("SELECT label FROM gics_version")]
+    finally:
+        reader.close()
+    assert labels == ["v1", "v2"]
+
+
+def test_versions_share_interned_text():
+    load_sample(Path("backend/sample_gics.csv"), "a", "2024-01-01")
+    with get_conn() as conn:
+        texts = conn.execute("SELECT COUNT(*) FROM gics_text").fetchone()[0]
+    load_sample(Path("backend/sample_gics.csv"), "b", "2024-06-01")
+    with get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM gics_text").fetchone()[0] == texts
+        cur = conn.execute(
+            "SELECT version_id, name, definition FROM gics_sub_industry WHERE code8='10101010' ORDER BY version_id"
+        )
+        assert [tuple(r) for r in cur.fetchall()] == [
+            (1, "Oil & Gas Drilling", "Companies that drill for oil & gas"),
+            (2, "Oil & Gas Drilling", "Companies that drill for oil & gas"),
+        ]
+
+
+def _create_legacy_db() -> None:
+    DB_PATH.unlink()
+    with get_conn() as conn:
+        conn.executescript(LEGACY_SCHEMA)
+        conn.executescript("""
+            INSERT INTO gics_version(label) VALUES ('old');
+            INSERT INTO gics_sector VALUES ('10', 'Energy', 1);
+            INSERT INTO gics_group VALUES ('1010', 'Energy', '10', 1);
+            INSERT INTO gics_industry VALUES ('101010', 'Drilling', '1010', 1);
+            INSERT INTO gics_sub_industry
+              VALUES ('10101010', 'Drilling', NULL, '101010', 1);
+            """)
+
+
+def test_init_db_migrates_inline_text_tables():
+    _create_legacy_db()
+    init_db()
+    with get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM gics_text").fetchone()[0] == 2
+        row = conn.execute("SELECT * FROM gics_sub_industry").fetchone()
+        assert tuple(row) == ("10101010", "Drilling", None, "101010", 1)
+        kinds = dict(
+            conn.execute(
+                "SELECT name, type FROM sqlite_master WHERE name LIKE 'gics_%'"
+            ).fetchall()
+        )
+        assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+        conn.execute("DELETE FROM gics_version WHERE id=1")
+        assert conn.execute("SELECT COUNT(*) FROM gics_sector").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM gics_sub_industry").fetchone()[0] == 0
+    assert kinds["gics_sector"] == "view"
+    assert not any(name.endswith("_legacy") for name in kinds)
+
+
+def test_concurrent_init_db_migrates_once():
+    _create_legacy_db()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(init_db) for _ in range(4)]
+    for future in futures:
+        future.result()
+    with get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM gics_sector").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM gics_text").fetchone()[0] == 2
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ClassVar
+
+import pytest
+
+from backend import download
+from backend.download import fetch_workbook, prune_cache
+
+BODY = b"PK\x03\x04 fake workbook bytes" * 100
+ETAG = '"v1"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits: ClassVar[list[int]] = []
+
+    def do_GET(self) -> None:
+        if self.headers.get("If-None-Match") == ETAG:
+            self.hits.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.hits.append(200)
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_revalidates_cached_download(server):
+    url = f"{server}/gics.xlsx"
+    first = fetch_workbook(url)
+    assert first.read_bytes() == BODY
+    second = fetch_workbook(url)
+    assert second == first
+    assert _Handler.hits == [200, 304]
+
+
+def test_fetch_rejects_oversized_download(server):
+    with pytest.raises(ValueError, match="exceeds"):
+        fetch_workbook(f"{server}/big.xlsx", max_bytes=10)
+
+
+def test_prune_evicts_unreferenced_blobs_first(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(download, "CACHE_DIR", tmp_path)
+    current = fetch_workbook(f"{server}/gics.xlsx")
+    orphan = tmp_path / "orphan.xlsx"
+    orphan.write_bytes(b"x" * 100)
+    os.utime(orphan, (0, 0))
+
+    prune_cache(max_bytes=len(BODY) + 50)
+    assert not orphan.exists()
+    assert current.exists()
+
+    prune_cache(max_bytes=0)
+    assert current.exists()
+
+    prune_cache(max_bytes=0, min_age=0)
+    assert not current.exists()
+    assert list((tmp_path / "urls").iterdir()) == []
+
+
+def test_fetch_refetches_blob_evicted_after_revalidation(server, monkeypatch):
+    url = f"{server}/evicted.xlsx"
+    first = fetch_workbook(url)
+    read_meta = download._read_meta
+
+    def read_then_evict(u: str) -> dict[str, str] | None:
+        meta = read_meta(u)
+        # Another worker evicts the blob between the lookup and the 304.
+        monkeypatch.setattr(download, "_read_meta", read_meta)
+        first.unlink()
+        return meta
+
+    monkeypatch.setattr(download, "_read_meta", read_then_evict)
+    again = fetch_workbook(url)
+    assert again.read_bytes() == BODY
+    assert _Handler.hits == [200, 304, 200]
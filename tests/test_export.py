@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from backend.ingest import load_sample
+from scripts.export import main
+
+pytestmark = pytest.mark.usefixtures("fresh_db")
+
+
+def test_export_all_versions_and_levels(tmp_path):
+    load_sample(Path("backend/sample_gics.csv"), "a", "2024-01-01")
+    load_sample(Path("backend/sample_gics.csv"), "b", "2024-06-01")
+    main(
+        [
+            "--version",
+            "all",
+            "--level",
+            "all",
+            "--out",
+            str(tmp_path),
+            "--format",
+            "jsonl",
+            "--compression",
+            "gzip",
+            "--workers",
+            "2",
+        ]
+    )
+    assert len(list(tmp_path.iterdir())) == 8
+    with gzip.open(tmp_path / "version2_subindustry.jsonl.gz", "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 4
+    assert rows[0]["code8"] == "10101010"
+    assert rows[0]["definition"] == "Companies that drill for oil & gas"
+
+
+def test_export_single_csv_file(tmp_path):
+    vid = load_sample(Path("backend/sample_gics.csv"), "a", "2024-01-01")
+    out = tmp_path / "sectors.csv"
+    main(["--version", str(vid), "--level", "sector", "--out", str(out)])
+    assert out.read_text().splitlines() == [
+        "code2,name",
+        "10,Energy",
+        "20,Materials",
+    ]
+
+
+def test_export_many_into_existing_file_is_an_error(tmp_path):
+    load_sample(Path("backend/sample_gics.csv"), "a", "2024-01-01")
+    out = tmp_path / "taken.csv"
+    out.write_text("keep me")
+    with pytest.raises(SystemExit):
+        main(["--version", "all", "--level", "all", "--out", str(out)])
+    assert out.read_text() == "keep me"
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+def test_export_parquet(tmp_path, compression):
+    pq = pytest.importorskip("pyarrow.parquet")
+    vid = load_sample(Path("backend/sample_gics.csv"), "a", "2024-01-01")
+    out = tmp_path / "sectors.parquet"
+    main(
+        [
+            "--version",
+            str(vid),
+            "--level",
+            "sector",
+            "--out",
+            str(out),
+            "--format",
+            "parquet",
+            "--compression",
+            compression,
+        ]
+    )
+    codec = pq.ParquetFile(out).metadata.row_group(0).column(0).compression
+    assert codec == {"none": "UNCOMPRESSED", "gzip": "GZIP"}[compression]
+    assert pq.read_table(out).to_pydict() == {
+        "code2": ["10", "20"],
+        "name": ["Energy", "Materials"],
+    }
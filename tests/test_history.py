@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from backend.db import get_conn
+from backend.history import code_history
+from backend.ingest import load_sample
+from backend.main import app
+
+pytestmark = pytest.mark.usefixtures("fresh_db")
+
+
+def test_history_reports_only_changes(tmp_path):
+    sample = Path("backend/sample_gics.csv")
+    renamed = tmp_path / "renamed.csv"
+    renamed.write_text(
+        sample.read_text().replace("10101010,Oil & Gas Drilling", "10101010,Renamed")
+    )
+    removed = tmp_path / "removed.csv"
+    removed.write_text(
+        "\n".join(
+            line for line in renamed.read_text().splitlines() if "10101010" not in line
+        )
+    )
+    v1 = load_sample(sample, "v1", "2020-01-01")
+    load_sample(sample, "v2", "2021-01-01")
+    v3 = load_sample(renamed, "v3", "2022-01-01")
+    v4 = load_sample(removed, "v4", "2023-01-01")
+
+    async def inner() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            r = await client.get("/api/history/10101010")
+            assert r.status_code == 200
+            timeline = r.json()
+            assert [(e["version_id"], e["change"]) for e in timeline] == [
+                (v1, "added"),
+                (v3, "changed"),
+                (v4, "removed"),
+            ]
+            assert timeline[0]["parent"] == "101010"
+            assert timeline[1]["name"] == "Renamed"
+            assert timeline[1]["changed_fields"] == ["name"]
+            r = await client.get("/api/history/99999999")
+            assert r.status_code == 404
+            r = await client.get("/api/history/abc")
+            assert r.status_code == 400
+
+    asyncio.run(inner())
+
+
+def test_history_puts_undated_versions_last(tmp_path):
+    sample = Path("backend/sample_gics.csv")
+    renamed = tmp_path / "renamed.csv"
+    renamed.write_text(
+        sample.read_text().replace("10101010,Oil & Gas Drilling", "10101010,Renamed")
+    )
+    v1 = load_sample(sample, "v1", "2020-01-01")
+    undated = load_sample(renamed, "draft", None)
+    load_sample(sample, "v3", "2021-01-01")
+    with get_conn() as conn:
+        timeline = code_history(conn, "10101010")
+    assert [(e["version_id"], e["change"]) for e in timeline] == [
+        (v1, "added"),
+        (undated, "changed"),
+    ]
+    assert timeline[-1]["effective_date"] is None
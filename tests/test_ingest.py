@@ -7,18 +7,10 @@ import pytest
 
 from pathlib import Path
 
-from backend.db import DB_PATH, get_conn, init_db
+from backend.db import get_conn
 from backend.ingest import load_from_excel, load_sample
 
-
-@pytest.fixture(autouse=True)
-def fresh_db():
-    if DB_PATH.exists():
-        DB_PATH.unlink()
-    init_db()
-    yield
-    if DB_PATH.exists():
-        DB_PATH.unlink()
+pytestmark = pytest.mark.usefixtures("fresh_db")
 
 
 def test_load_sample_inserts_data():
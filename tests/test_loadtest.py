@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from scripts.loadtest import compare, percentile, summarize
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_and_compare_against_baseline():
+    samples = [("tree", 0.010, 200)] * 9 + [("tree", 0.100, 500)]
+    report = summarize(samples, elapsed=2.0)
+    assert report["tree"]["requests"] == 10
+    assert report["tree"]["errors"] == 1
+    assert report["tree"]["rps"] == 5.0
+    assert report["tree"]["p50_ms"] == 10.0
+    assert report["tree"]["p99_ms"] == 100.0
+
+    baseline = {"tree": {**report["tree"], "p95_ms": 50.0}}
+    assert compare(report, baseline, max_regression=0.25) == [
+        "tree: p95 50.0ms -> 100.0ms (+100%)"
+    ]
+    assert compare(report, baseline, max_regression=1.5) == []
@@ -1,11 +1,13 @@
 import asyncio
+import csv
 import httpx
 import pandas as pd
 import pytest
 
-from backend.db import DB_PATH, init_db
+from backend.db import DB_PATH, SNAPSHOT_PATH, init_db
 from backend.ingest import load_sample
 from backend.main import app
+from io import StringIO
 from pathlib import Path
 
 
@@ -18,6 +20,7 @@ def setup_db():
     yield
     if DB_PATH.exists():
         DB_PATH.unlink()
+    SNAPSHOT_PATH.unlink(missing_ok=True)
 
 
 def test_versions_and_tree():
@@ -59,12 +62,10 @@ def test_ingest_url(monkeypatch, tmp_path):
     xlsx = tmp_path / "gics.xlsx"
     df.to_excel(xlsx, index=False)
 
-    def fake_get(self, url, *args, **kwargs):
-        return httpx.Response(
-            200, content=xlsx.read_bytes(), request=httpx.Request("GET", url)
-        )
+    def fake_send(self, request, *args, **kwargs):
+        return httpx.Response(200, content=xlsx.read_bytes(), request=request)
 
-    monkeypatch.setattr(httpx.Client, "get", fake_get)
+    monkeypatch.setattr(httpx.Client, "send", fake_send)
 
     async def inner() -> None:
         transport = httpx.ASGITransport(app=app)
@@ -84,3 +85,213 @@ def test_ingest_url(monkeypatch, tmp_path):
             assert vid in ids
 
     asyncio.run(inner())
+
+
+def test_enrich_streams_rows():
+    holdings = "ticker,sub_code,weight\nAAA,10101010,0.6\nBBB,99999999,0.4\n"
+
+    async def inner() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            vid = (await client.get("/api/versions")).json()[0]["id"]
+            r = await client.post(
+                f"/api/enrich/{vid}",
+                files={"file": ("holdings.csv", holdings, "text/csv")},
+            )
+            assert r.status_code == 200
+            rows = list(csv.reader(StringIO(r.text)))
+            assert rows[0][-6:] == [
+                "sector_code",
+                "sector_name",
+                "group_code",
+                "group_name",
+                "industry_code",
+                "industry_name",
+            ]
+            assert rows[1] == [
+                "AAA",
+                "10101010",
+                "0.6",
+                "10",
+                "Energy",
+                "1010",
+                "Energy Equipment & Services",
+                "101010",
+                "Oil & Gas Drilling",
+            ]
+            assert rows[2][3:] == [""] * 6
+            r = await client.post(
+                f"/api/enrich/{vid}",
+                params={"code_column": "gics"},
+                files={"file": ("holdings.csv", holdings, "text/csv")},
+            )
+            assert r.status_code == 400
+
+    asyncio.run(inner())
+
+
+def test_suggest_matches_codes_and_name_prefixes():
+    async def inner() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            vid = (await client.get("/api/versions")).json()[0]["id"]
+            r = await client.get(
+                "/api/suggest", params={"q": "1010", "version_id": vid}
+            )
+            assert r.status_code == 200
+            assert [s["code"] for s in r.json()] == [
+                "1010",
+                "101010",
+                "101020",
+                "10101010",
+                "10102010",
+            ]
+            r = await client.get(
+                "/api/suggest", params={"q": "gas equip", "version_id": vid}
+            )
+            hits = r.json()
+            assert [s["code"] for s in hits] == ["101020", "10102010"]
+            assert [n["code"] for n in hits[0]["ancestry"]] == [
+                "10",
+                "1010",
+                "101020",
+            ]
+            r = await client.get("/api/suggest", params={"q": "x", "version_id": 999})
+            assert r.status_code == 404
+
+    asyncio.run(inner())
+
+
+def test_tree_msgpack_negotiation_matches_json():
+    msgpack = pytest.importorskip("msgpack")
+
+    async def inner() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            vid = (await client.get("/api/versions")).json()[0]["id"]
+            as_json = await client.get(f"/api/tree/{vid}")
+            assert as_json.headers["content-type"] == "application/json"
+            packed = await client.get(
+                f"/api/tree/{vid}", headers={"Accept": "application/msgpack"}
+            )
+            assert packed.headers["content-type"] == "application/msgpack"
+            assert msgpack.unpackb(packed.content) == as_json.json()
+            again = await client.get(f"/api/tree/{vid}")
+            assert again.content == as_json.content
+
+    asyncio.run(inner())
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        ("application/msgpack", True),
+        ("application/x-msgpack", True),
+        ("application/json, application/msgpack;q=0", False),
+        ("application/json;q=0.5, application/msgpack", True),
+        ("application/json, application/msgpack", False),
+        ("application/msgpack;q=0.5, */*;q=0.9", False),
+        ("*/*;q=0.1, application/msgpack;q=0.2", True),
+        ("*/*", False),
+        ("", False),
+    ],
+)
+def test_wants_msgpack_honours_quality_values(accept, expected):
+    pytest.importorskip("msgpack")
+    from starlette.requests import Request
+
+    from backend.responses import wants_msgpack
+
+    request = Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+    assert wants_msgpack(request) is expected
+
+
+def test_negotiated_responses_vary_on_accept():
+    async def inner() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            r = await client.get("/api/versions")
+            assert r.headers["vary"] == "Accept"
+            vid = r.json()[0]["id"]
+            r = await client.get(f"/api/tree/{vid}")
+            assert r.headers["vary"] == "Accept"
+
+    asyncio.run(inner())
+
+
+def test_json_falls_back_to_stdlib(monkeypatch):
+    from backend import responses
+
+    monkeypatch.setattr(responses, "orjson", None)
+    assert responses.dumps({"name": "Énergie", "codes": [1, 2]}) == (
+        '{"name":"Énergie","codes":[1,2]}'.encode()
+    )
+
+
+def test_rollup_aggregates_every_level():
+    async def inner() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            vid = (await client.get("/api/versions")).json()[0]["id"]
+            payload = {
+                "codes": ["10101010", "10102010", "15101010", "10101010", "nope"],
+                "weights": [0.1, 0.2, 0.3, 0.15, 0.25],
+            }
+            r = await client.post(f"/api/rollup/{vid}", json=payload)
+            assert r.status_code == 200
+            body = r.json()
+            subs = {s["code"]: s["weight"] for s in body["subindustry"]}
+            assert subs == pytest.approx(
+                {"10101010": 0.25, "10102010": 0.2, "15101010": 0.3}
+            )
+            industries = {s["code"]: s["weight"] for s in body["industry"]}
+            assert industries == pytest.approx(
+                {"101010": 0.25, "101020": 0.2, "151010": 0.3}
+            )
+            assert [(s["code"], s["name"]) for s in body["sector"]] == [
+                ("10", "Energy"),
+                ("20", "Materials"),
+            ]
+            sectors = [s["weight"] for s in body["sector"]]
+            assert sectors == pytest.approx([0.45, 0.3])
+            assert body["unmatched_weight"] == pytest.approx(0.25)
+            assert body["unmatched_count"] == 1
+            r = await client.post(
+                f"/api/rollup/{vid}", json={"codes": ["10101010"], "weights": []}
+            )
+            assert r.status_code == 400
+
+    asyncio.run(inner())
+
+
+def test_enrich_aligns_ragged_rows_and_replaces_bad_bytes():
+    holdings = b"ticker,sub_code\nAAA,10101010,extra\n\xff\xfeB,15101010\n"
+
+    async def inner() -> None:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            vid = (await client.get("/api/versions")).json()[0]["id"]
+            r = await client.post(
+                f"/api/enrich/{vid}",
+                files={"file": ("holdings.csv", holdings, "text/csv")},
+            )
+            assert r.status_code == 200
+            rows = list(csv.reader(StringIO(r.text)))
+            assert all(len(row) == 8 for row in rows)
+            assert rows[1][:3] == ["AAA", "10101010", "10"]
+            assert rows[2][0] == "��B"
+            assert rows[2][2] == "20"
+
+    asyncio.run(inner())